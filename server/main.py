@@ -6,16 +6,34 @@ Provides safe file operations within a sandboxed directory.
 
 import asyncio
 import argparse
-import json
+import codecs
+import functools
+import heapq
+import io
 import os
+import stat
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
 
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 from pydantic import BaseModel
 
+try:
+    import fastjsonschema
+except ImportError:  # argument validation is skipped without it
+    fastjsonschema = None
+
+try:
+    import uvloop
+except ImportError:  # falls back to the stock asyncio event loop
+    uvloop = None
+
+
+# Block size for streaming file reads (one page on most Unix systems)
+READ_CHUNK_SIZE = 4096
+
 
 class Config(BaseModel):
     name: str
@@ -27,240 +45,369 @@ class Config(BaseModel):
     read_only: bool
 
 
+@functools.lru_cache(maxsize=None)
+def _load_config(config_file: Path) -> Config:
+    """Parse and validate a config file, caching the result per path."""
+    if config_file.exists():
+        # Parse and validate in one pass with pydantic-core's native JSON parser
+        with open(config_file, 'rb') as f:
+            return Config.model_validate_json(f.read())
+
+    # Default config if file doesn't exist
+    config_data = {
+        "name": "filesystem-server",
+        "version": "1.0.0",
+        "description": "A safe file system MCP server",
+        "sandbox_path": "./sandbox",
+        "max_file_size": 10485760,
+        "allowed_extensions": [".txt", ".json", ".md", ".py", ".js", ".html", ".css"],
+        "read_only": False
+    }
+
+    return Config.model_validate(config_data)
+
+
 class FileSystemServer:
     def __init__(self, sandbox_path: str = "./sandbox", read_only: bool = False, config_path: str = "config.json"):
-        # Load default config
+        # Load default config, then override with command line arguments
         config_file = Path(__file__).parent / config_path
-        if config_file.exists():
-            with open(config_file, 'r') as f:
-                config_data = json.load(f)
-        else:
-            # Default config if file doesn't exist
-            config_data = {
-                "name": "filesystem-server",
-                "version": "1.0.0",
-                "description": "A safe file system MCP server",
-                "sandbox_path": sandbox_path,
-                "max_file_size": 10485760,
-                "allowed_extensions": [".txt", ".json", ".md", ".py", ".js", ".html", ".css"],
-                "read_only": read_only
-            }
-
-        # Override with command line arguments
-        config_data["sandbox_path"] = sandbox_path
-        config_data["read_only"] = read_only
+        self.config = _load_config(config_file).model_copy(
+            update={"sandbox_path": sandbox_path, "read_only": read_only}
+        )
 
-        self.config = Config(**config_data)
+        # Plain attributes for the values checked on every request
+        self._allowed_ext: FrozenSet[str] = frozenset(self.config.allowed_extensions)
+        self._max_size: int = self.config.max_file_size
+        self._read_only: bool = self.config.read_only
 
         # Create sandbox directory if it doesn't exist
         self.sandbox_path = Path(self.config.sandbox_path).resolve()
         self.sandbox_path.mkdir(exist_ok=True)
+        self._sandbox_str = str(self.sandbox_path)
+        self._sandbox_prefix = self._sandbox_str.rstrip(os.sep) + os.sep
+
+        # Directories known to exist, so writes can skip the mkdir
+        self._known_dirs: Set[str] = {self._sandbox_str}
+
+        # Tool definitions are static, so build them once
+        self._tools_cache: List[Tool] = self._build_tools()
+
+        # Compile each tool's input schema once for argument validation
+        self._validators: Dict[str, Callable[[Any], Any]] = {}
+        if fastjsonschema is not None:
+            self._validators = {
+                tool.name: fastjsonschema.compile(tool.inputSchema)
+                for tool in self._tools_cache
+            }
+
+        # Map tool names to their implementations
+        self._dispatch: Dict[str, Callable[..., Awaitable[List[TextContent]]]] = {
+            "list_files": self._list_files,
+            "read_file": self._read_file,
+            "write_file": self._write_file,
+            "create_directory": self._create_directory,
+            "delete_file": self._delete_file,
+        }
+
+        # Argument names each tool accepts; extra keys are ignored
+        self._tool_params: Dict[str, Tuple[str, ...]] = {
+            tool.name: tuple(tool.inputSchema["properties"])
+            for tool in self._tools_cache
+        }
 
         # Initialize MCP server
         self.server = Server(self.config.name)
         self._register_tools()
 
+    def _build_tools(self) -> List[Tool]:
+        """Build the static list of tools exposed by this server."""
+        return [
+            Tool(
+                name="list_files",
+                description="List files and directories in a given path",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "path": {
+                            "type": "string",
+                            "description": "Directory path to list (relative to sandbox)"
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "description": "Maximum number of entries to return, in name order (optional)"
+                        }
+                    },
+                    "required": ["path"]
+                }
+            ),
+            Tool(
+                name="read_file",
+                description="Read the contents of a file",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "path": {
+                            "type": "string",
+                            "description": "File path to read (relative to sandbox)"
+                        }
+                    },
+                    "required": ["path"]
+                }
+            ),
+            Tool(
+                name="write_file",
+                description="Write content to a file",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "path": {
+                            "type": "string",
+                            "description": "File path to write (relative to sandbox)"
+                        },
+                        "content": {
+                            "type": "string",
+                            "description": "Content to write to the file"
+                        }
+                    },
+                    "required": ["path", "content"]
+                }
+            ),
+            Tool(
+                name="create_directory",
+                description="Create a new directory",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "path": {
+                            "type": "string",
+                            "description": "Directory path to create (relative to sandbox)"
+                        }
+                    },
+                    "required": ["path"]
+                }
+            ),
+            Tool(
+                name="delete_file",
+                description="Delete a file or directory",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "path": {
+                            "type": "string",
+                            "description": "File or directory path to delete (relative to sandbox)"
+                        }
+                    },
+                    "required": ["path"]
+                }
+            )
+        ]
+
     def _register_tools(self):
         """Register all available tools with the MCP server."""
 
         @self.server.list_tools()
         async def list_tools() -> List[Tool]:
-            return [
-                Tool(
-                    name="list_files",
-                    description="List files and directories in a given path",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "Directory path to list (relative to sandbox)"
-                            }
-                        },
-                        "required": ["path"]
-                    }
-                ),
-                Tool(
-                    name="read_file",
-                    description="Read the contents of a file",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "File path to read (relative to sandbox)"
-                            }
-                        },
-                        "required": ["path"]
-                    }
-                ),
-                Tool(
-                    name="write_file",
-                    description="Write content to a file",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "File path to write (relative to sandbox)"
-                            },
-                            "content": {
-                                "type": "string",
-                                "description": "Content to write to the file"
-                            }
-                        },
-                        "required": ["path", "content"]
-                    }
-                ),
-                Tool(
-                    name="create_directory",
-                    description="Create a new directory",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "Directory path to create (relative to sandbox)"
-                            }
-                        },
-                        "required": ["path"]
-                    }
-                ),
-                Tool(
-                    name="delete_file",
-                    description="Delete a file or directory",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "File or directory path to delete (relative to sandbox)"
-                            }
-                        },
-                        "required": ["path"]
-                    }
-                )
-            ]
+            return self._tools_cache
 
-        @self.server.call_tool()
+        # Compiled validators replace mcp's interpretive jsonschema check
+        @self.server.call_tool(validate_input=not self._validators)
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+            # Raised outside the try so mcp reports it as an isError result
+            validator = self._validators.get(name)
+            if validator is not None:
+                try:
+                    validator(arguments)
+                except fastjsonschema.JsonSchemaException as e:
+                    raise ValueError(f"Input validation error: {e.message}") from e
+
             try:
-                if name == "list_files":
-                    return await self._list_files(arguments["path"])
-                elif name == "read_file":
-                    return await self._read_file(arguments["path"])
-                elif name == "write_file":
-                    return await self._write_file(arguments["path"], arguments["content"])
-                elif name == "create_directory":
-                    return await self._create_directory(arguments["path"])
-                elif name == "delete_file":
-                    return await self._delete_file(arguments["path"])
-                else:
+                handler = self._dispatch.get(name)
+                if handler is None:
                     return [TextContent(type="text", text=f"Unknown tool: {name}")]
+                params = self._tool_params[name]
+                return await handler(**{k: arguments[k] for k in params if k in arguments})
             except Exception as e:
                 return [TextContent(type="text", text=f"Error: {str(e)}")]
 
-    def _validate_path(self, path: str) -> Path:
+    def _validate_path(self, path: str) -> str:
         """Validate and resolve a path within the sandbox."""
-        # Convert to Path and resolve
-        target_path = (self.sandbox_path / path).resolve()
+        # Cheap lexical check first rejects '..' and absolute paths
+        target = os.path.normpath(os.path.join(self._sandbox_str, path))
+        if not self._in_sandbox(target):
+            raise ValueError(f"Path '{path}' is outside the sandbox directory")
 
-        # Ensure the path is within the sandbox
-        if not str(target_path).startswith(str(self.sandbox_path)):
+        # Resolve symlinks so a link inside the sandbox cannot point outside it
+        target = os.path.realpath(target)
+        if not self._in_sandbox(target):
             raise ValueError(f"Path '{path}' is outside the sandbox directory")
 
-        return target_path
+        return target
+
+    def _in_sandbox(self, target: str) -> bool:
+        """Check whether a normalized path is the sandbox or inside it."""
+        return target == self._sandbox_str or target.startswith(self._sandbox_prefix)
 
-    async def _list_files(self, path: str) -> List[TextContent]:
+    @staticmethod
+    def _stat_or_none(path: str) -> Optional[os.stat_result]:
+        """Stat a path once, returning None if it does not exist."""
+        try:
+            return os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    @staticmethod
+    def _do_read(path: str) -> str:
+        """Read and decode a file (runs in a worker thread)."""
+        # Decode page-sized blocks incrementally rather than slurping the
+        # whole file into one bytes object first; newlines are translated
+        # the same way read_text() does
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+        chunks = []
+        with open(path, 'rb', buffering=0) as f:
+            while True:
+                block = f.read(READ_CHUNK_SIZE)
+                if not block:
+                    break
+                chunks.append(decoder.decode(block))
+        chunks.append(decoder.decode(b'', final=True))
+        return "".join(chunks)
+
+    @staticmethod
+    def _do_write(path: Path, data: bytes, make_parents: bool) -> None:
+        """Write bytes to a file (runs in a worker thread)."""
+        # Create parent directories if they don't exist
+        if make_parents:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            path.write_bytes(data)
+        except FileNotFoundError:
+            # Parent was removed outside the server; recreate and retry once
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+
+    @staticmethod
+    def _do_list(path: str, limit: Optional[int] = None) -> List[str]:
+        """Format the entries of a directory (runs in a worker thread)."""
+        # DirEntry caches the file type from the directory read itself
+        with os.scandir(path) as it:
+            if limit:
+                # Partial sort: O(n log k) when only the first entries are needed
+                entries = heapq.nsmallest(limit, it, key=lambda e: e.name)
+            else:
+                entries = sorted(it, key=lambda e: e.name)
+
+        # %-formatting is a single C call per row, unlike f-string format specs
+        return [
+            "%-4s %10s %s" % (
+                "dir" if entry.is_dir() else "file",
+                entry.stat().st_size if entry.is_file() else "-",
+                entry.name,
+            )
+            for entry in entries
+        ]
+
+    async def _list_files(self, path: str, limit: Optional[int] = None) -> List[TextContent]:
         """List files and directories in the given path."""
         target_path = self._validate_path(path)
+        st = self._stat_or_none(target_path)
 
-        if not target_path.exists():
+        if st is None:
             return [TextContent(type="text", text=f"Path does not exist: {path}")]
 
-        if not target_path.is_dir():
+        if not stat.S_ISDIR(st.st_mode):
             return [TextContent(type="text", text=f"Path is not a directory: {path}")]
 
-        items = []
-        for item in sorted(target_path.iterdir()):
-            item_type = "dir" if item.is_dir() else "file"
-            size = item.stat().st_size if item.is_file() else "-"
-            items.append(f"{item_type:4} {size:>10} {item.name}")
-
+        items = await asyncio.to_thread(self._do_list, target_path, limit)
         result = f"Contents of {path}:\n" + "\n".join(items)
         return [TextContent(type="text", text=result)]
 
     async def _read_file(self, path: str) -> List[TextContent]:
         """Read the contents of a file."""
         target_path = self._validate_path(path)
+        st = self._stat_or_none(target_path)
 
-        if not target_path.exists():
+        if st is None:
             return [TextContent(type="text", text=f"File does not exist: {path}")]
 
-        if not target_path.is_file():
+        if not stat.S_ISREG(st.st_mode):
             return [TextContent(type="text", text=f"Path is not a file: {path}")]
 
         # Check file size
-        if target_path.stat().st_size > self.config.max_file_size:
-            return [TextContent(type="text", text=f"File too large (max {self.config.max_file_size} bytes)")]
+        if st.st_size > self._max_size:
+            return [TextContent(type="text", text=f"File too large (max {self._max_size} bytes)")]
 
         try:
-            content = target_path.read_text(encoding='utf-8')
+            content = await asyncio.to_thread(self._do_read, target_path)
             return [TextContent(type="text", text=content)]
         except UnicodeDecodeError:
             return [TextContent(type="text", text="Error: File contains non-UTF-8 content")]
 
     async def _write_file(self, path: str, content: str) -> List[TextContent]:
         """Write content to a file."""
-        if self.config.read_only:
+        if self._read_only:
             return [TextContent(type="text", text="Server is in read-only mode")]
 
-        target_path = self._validate_path(path)
+        # UTF-8 needs at least one byte per character, so oversized content
+        # can be rejected before encoding
+        if len(content) > self._max_size:
+            return [TextContent(type="text", text=f"Content too large (max {self._max_size} bytes)")]
 
-        # Check file extension
-        if target_path.suffix and target_path.suffix not in self.config.allowed_extensions:
-            return [TextContent(type="text", text=f"File extension not allowed: {target_path.suffix}")]
+        # Keep write_text()'s newline translation on platforms like Windows
+        if os.linesep != "\n":
+            content = content.replace("\n", os.linesep)
 
-        # Check content size
-        if len(content.encode('utf-8')) > self.config.max_file_size:
-            return [TextContent(type="text", text=f"Content too large (max {self.config.max_file_size} bytes)")]
+        # Check exact content size; encode once and reuse the bytes for the write
+        encoded = content.encode('utf-8')
+        if len(encoded) > self._max_size:
+            return [TextContent(type="text", text=f"Content too large (max {self._max_size} bytes)")]
 
-        # Create parent directories if they don't exist
-        target_path.parent.mkdir(parents=True, exist_ok=True)
+        # Path resolution stats each component, so it runs after the checks
+        # that don't need it; the extension must come from the resolved path
+        target_path = Path(self._validate_path(path))
+
+        # Check file extension
+        if target_path.suffix and target_path.suffix not in self._allowed_ext:
+            return [TextContent(type="text", text=f"File extension not allowed: {target_path.suffix}")]
 
-        target_path.write_text(content, encoding='utf-8')
+        parent = str(target_path.parent)
+        await asyncio.to_thread(self._do_write, target_path, encoded, parent not in self._known_dirs)
+        self._known_dirs.add(parent)
         return [TextContent(type="text", text=f"File written successfully: {path}")]
 
     async def _create_directory(self, path: str) -> List[TextContent]:
         """Create a new directory."""
-        if self.config.read_only:
+        if self._read_only:
             return [TextContent(type="text", text="Server is in read-only mode")]
 
         target_path = self._validate_path(path)
 
-        if target_path.exists():
+        if os.path.exists(target_path):
             return [TextContent(type="text", text=f"Path already exists: {path}")]
 
-        target_path.mkdir(parents=True, exist_ok=True)
+        os.makedirs(target_path, exist_ok=True)
+        self._known_dirs.add(target_path)
         return [TextContent(type="text", text=f"Directory created successfully: {path}")]
 
     async def _delete_file(self, path: str) -> List[TextContent]:
         """Delete a file or directory."""
-        if self.config.read_only:
+        if self._read_only:
             return [TextContent(type="text", text="Server is in read-only mode")]
 
         target_path = self._validate_path(path)
+        st = self._stat_or_none(target_path)
 
-        if not target_path.exists():
+        if st is None:
             return [TextContent(type="text", text=f"Path does not exist: {path}")]
 
-        if target_path.is_file():
-            target_path.unlink()
+        if stat.S_ISREG(st.st_mode):
+            await asyncio.to_thread(os.unlink, target_path)
             return [TextContent(type="text", text=f"File deleted successfully: {path}")]
-        elif target_path.is_dir():
+        elif stat.S_ISDIR(st.st_mode):
             # Only delete empty directories for safety
             try:
-                target_path.rmdir()
+                await asyncio.to_thread(os.rmdir, target_path)
+                self._known_dirs.discard(target_path)
                 return [TextContent(type="text", text=f"Directory deleted successfully: {path}")]
             except OSError:
                 return [TextContent(type="text", text=f"Directory not empty: {path}")]
@@ -326,4 +473,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file
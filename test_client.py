@@ -7,8 +7,8 @@ This demonstrates how to interact with the server programmatically.
 import asyncio
 import subprocess
 import json
+import os
 import sys
-from pathlib import Path
 
 
 async def test_mcp_server():
@@ -91,22 +91,29 @@ def show_project_structure():
     print("\n📁 Project Structure:")
     print("=" * 40)
 
-    def print_tree(path, prefix="", max_depth=3, current_depth=0):
-        if current_depth >= max_depth:
-            return
-
-        items = sorted(path.iterdir()) if path.is_dir() else []
-        for i, item in enumerate(items):
-            is_last = i == len(items) - 1
-            current_prefix = "└── " if is_last else "├── "
-            print(f"{prefix}{current_prefix}{item.name}")
-
-            if item.is_dir() and not item.name.startswith('.'):
-                next_prefix = prefix + ("    " if is_last else "│   ")
-                print_tree(item, next_prefix, max_depth, current_depth + 1)
-
-    project_root = Path(".")
-    print_tree(project_root)
+    def sorted_entries(path):
+        # Reverse order so pop() yields entries alphabetically
+        with os.scandir(path) as it:
+            return sorted(it, key=lambda e: e.name, reverse=True)
+
+    max_depth = 3
+
+    # Explicit stack of (remaining entries, prefix) instead of recursion
+    stack = [(sorted_entries("."), "")]
+    while stack:
+        entries, prefix = stack[-1]
+        if not entries:
+            stack.pop()
+            continue
+
+        item = entries.pop()
+        is_last = not entries
+        current_prefix = "└── " if is_last else "├── "
+        print(f"{prefix}{current_prefix}{item.name}")
+
+        if item.is_dir() and not item.name.startswith('.') and len(stack) < max_depth:
+            next_prefix = prefix + ("    " if is_last else "│   ")
+            stack.append((sorted_entries(item.path), next_prefix))
 
 
 async def main():